@@ -0,0 +1,90 @@
+import threading
+import time
+import numpy as np
+
+
+class BatchCandleAnalyzer:
+    """Analiza varios símbolos a la vez apilando sus velas en arrays (símbolos x tiempo)
+
+    Todos los símbolos cierran vela en el mismo límite de 60 segundos, así que en lugar de
+    llamar a analyze_market una vez por símbolo se agrupan las ventanas de igual longitud,
+    se calcula cada indicador para todo el grupo con operaciones por eje y las condiciones
+    de COMPRA se evalúan como una máscara. Sólo los símbolos marcados pasan por
+    process_signal, que aplica el cooldown y emite la señal igual que en el camino normal.
+
+    Los analizadores deben compartir los parámetros de indicadores; se toman del primero.
+    """
+
+    def __init__(self, analyzers, grace_seconds=2, poll_seconds=0.05):
+        self.analyzers = list(analyzers)
+        self.reference = self.analyzers[0]
+        self.grace_seconds = grace_seconds
+        self.poll_seconds = poll_seconds
+        for analyzer in self.analyzers:
+            analyzer.batched = True
+
+        a = self.reference
+        # Longitud mínima para que ningún indicador caiga en su rama de "pocos datos"
+        self.min_batch_length = max(
+            a.ema_trend_period, a.macd_slow + a.macd_signal, a.rsi_period + 1, a.atr_period + 1,
+            a.stoch_k + a.stoch_slow + a.stoch_d - 2, a.volume_ma_period,
+            2 * a.adx_period, a.roc_period + 1
+        )
+
+    def start(self):
+        threading.Thread(target=self.run, daemon=True).start()
+        return self
+
+    def run(self):
+        """Espera al cierre de vela de cualquier símbolo y analiza juntos los que estén listos"""
+        while True:
+            try:
+                if any(a.new_candle_ready for a in self.analyzers):
+                    # Esperar a los símbolos conectados cuyo primer tick del nuevo minuto aún no
+                    # llegó, como mucho grace_seconds; los rezagados entran en el siguiente lote
+                    deadline = time.time() + self.grace_seconds
+                    while (time.time() < deadline and
+                           not all(a.new_candle_ready or not a.connected for a in self.analyzers)):
+                        time.sleep(self.poll_seconds)
+                    ready = [a for a in self.analyzers if a.new_candle_ready]
+                    for analyzer in ready:
+                        analyzer.new_candle_ready = False
+                    self.analyze(ready)
+                time.sleep(self.poll_seconds)
+            except Exception as e:
+                print(f"❌ Error en el análisis por lotes: {e}")
+                time.sleep(1)
+
+    def analyze(self, analyzers=None):
+        analyzers = self.analyzers if analyzers is None else analyzers
+
+        # Agrupar por longitud de ventana (tras el calentamiento todas son candles.maxlen)
+        groups = {}
+        for analyzer in analyzers:
+            length = min(analyzer.candle_count, analyzer.candles.maxlen)
+            if length >= self.min_batch_length and length >= analyzer.min_candles:
+                groups.setdefault(length, []).append(analyzer)
+            else:
+                analyzer.analyze_market()
+
+        for length, group in groups.items():
+            # Un solo np.stack de las vistas del buffer circular: (símbolos x campos x tiempo)
+            windows = np.stack([analyzer.candle_window(length) for analyzer in group])
+            stack = {field: windows[:, i, :] for i, field in enumerate(self.reference.candle_fields)}
+            try:
+                indicators = self.reference.calculate_last_values(stack['close'], stack['high'],
+                                                                  stack['low'], stack['volume'])
+            except Exception as e:
+                print(f"❌ Error calculando indicadores por lotes: {e}")
+                continue
+
+            indicators.update({
+                'close': stack['close'][:, -1],
+                'volume': stack['volume'][:, -1],
+                'price_change': stack['price_change'][:, -1],
+                'n_candles': np.full(len(group), length)
+            })
+            conditions = self.reference.evaluate_conditions(indicators)
+
+            for row in np.flatnonzero(conditions['buy_setup']):
+                group[row].process_signal({name: values[row] for name, values in indicators.items()})
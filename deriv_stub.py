@@ -0,0 +1,434 @@
+import socket
+import threading
+import json
+import time
+import base64
+import hashlib
+import struct
+import re
+import random
+import numpy as np
+import pandas as pd
+
+WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+
+class SyntheticTickSource:
+    """Genera ticks sintéticos estilo BOOM/CRASH para un símbolo"""
+
+    def __init__(self, symbol, start_price=10000.0, seed=None):
+        self.symbol = symbol
+        match = re.match(r"(BOOM|CRASH)(\d+)", symbol.upper())
+        self.direction = 1 if not match or match.group(1) == "BOOM" else -1
+        # BOOM1000 = un spike cada ~1000 ticks de media
+        self.spike_interval = int(match.group(2)) if match else 1000
+        self.price = start_price
+        self.epoch = int(time.time())
+        self.rng = np.random.default_rng(seed)
+
+    def next_batch(self, n):
+        """Devuelve n ticks (epoch, quote) simulando un tick por segundo"""
+        drift = -self.direction * 0.01 + self.rng.normal(0, 0.05, n)
+        spikes = self.rng.random(n) < 1.0 / self.spike_interval
+        drift[spikes] += self.direction * self.rng.uniform(5, 20, spikes.sum())
+        quotes = np.round(self.price + np.cumsum(drift), 2)
+        epochs = np.arange(self.epoch, self.epoch + n)
+        self.price = float(quotes[-1])
+        self.epoch += n
+        return list(zip(epochs.tolist(), quotes.tolist()))
+
+
+class ReplayTickSource:
+    """Reproduce ticks grabados desde un CSV con columnas epoch, quote (y opcionalmente symbol)
+
+    Si el CSV tiene columna symbol se reproduce sólo recorded_symbol (por defecto el propio
+    símbolo); si no está grabado se lanza ValueError en lugar de mezclar todos los símbolos.
+    """
+
+    def __init__(self, symbol, path, loop=True, recorded_symbol=None):
+        self.symbol = symbol
+        df = pd.read_csv(path)
+        if 'symbol' in df.columns:
+            recorded_symbol = recorded_symbol or symbol
+            if not (df['symbol'] == recorded_symbol).any():
+                available = ", ".join(sorted(df['symbol'].astype(str).unique()))
+                raise ValueError(f"{recorded_symbol} no está grabado en {path} (disponibles: {available})")
+            df = df[df['symbol'] == recorded_symbol]
+        self.epochs = df['epoch'].to_numpy(dtype=np.int64)
+        self.quotes = df['quote'].to_numpy(dtype=float)
+        if len(self.epochs) == 0:
+            raise ValueError(f"No hay ticks en {path}")
+        self.loop = loop
+        self.position = 0
+        self.epoch_offset = 0
+
+    def next_batch(self, n):
+        ticks = []
+        while len(ticks) < n:
+            if self.position >= len(self.epochs):
+                if not self.loop:
+                    break
+                # Desplazar los epochs para que la repetición siga siendo monótona
+                self.epoch_offset += int(self.epochs[-1] - self.epochs[0]) + 1
+                self.position = 0
+            end = min(self.position + n - len(ticks), len(self.epochs))
+            epochs = self.epochs[self.position:end] + self.epoch_offset
+            ticks.extend(zip(epochs.tolist(), self.quotes[self.position:end].tolist()))
+            self.position = end
+        return ticks
+
+
+class DerivStubServer:
+    """Servidor WebSocket local que imita el subconjunto de la API de Deriv usado por el analizador
+
+    Soporta 'authorize', suscripción a 'ticks', 'forget_all' y 'ping', además de
+    inyección de errores y desconexiones forzadas para pruebas de carga. Cada tick lleva
+    'stub_seq' (secuencia por símbolo que sobrevive a las reconexiones) y 'stub_sent'
+    (time.time() del envío) para que el harness detecte huecos y mida latencia entre procesos.
+
+    Por HTTP responde a /stats (contadores), /pause y /resume (detener o reanudar los streams)
+    y a cualquier otra ruta como health check.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, rate=1.0, replay_path=None,
+                 error_rate=0.0, disconnect_every=None, valid_token=None, seed=None):
+        self.host = host
+        self.port = port
+        self.rate = rate
+        self.replay_path = replay_path
+        self.error_rate = error_rate
+        self.disconnect_every = disconnect_every
+        self.valid_token = valid_token
+        self.seed = seed
+
+        # Las fuentes son por símbolo y sobreviven a las reconexiones
+        self.sources = {}
+        self.sources_lock = threading.Lock()
+        self.sent_ticks = {}
+        self.failed_ticks = {}
+        self.errors_sent = 0
+        self.disconnects = 0
+        self.connections = 0
+
+        self.sock = None
+        self.running = False
+        self.paused = False
+
+    @property
+    def url(self):
+        return f"ws://{self.host}:{self.port}"
+
+    def start(self):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.sock.bind((self.host, self.port))
+        self.sock.listen(128)
+        self.port = self.sock.getsockname()[1]
+        self.running = True
+        threading.Thread(target=self._accept_loop, daemon=True).start()
+        print(f"🧪 Servidor Deriv local escuchando en {self.url}")
+        return self
+
+    def stop(self):
+        self.running = False
+        if self.sock:
+            self.sock.close()
+
+    def get_source(self, symbol):
+        with self.sources_lock:
+            if symbol not in self.sources:
+                if self.replay_path:
+                    # Variantes del harness como BOOM1000_6 reproducen el símbolo grabado BOOM1000
+                    self.sources[symbol] = ReplayTickSource(symbol, self.replay_path,
+                                                            recorded_symbol=symbol.split("_")[0])
+                else:
+                    seed = None if self.seed is None else self.seed + len(self.sources)
+                    self.sources[symbol] = SyntheticTickSource(symbol, seed=seed)
+                self.sent_ticks[symbol] = 0
+                self.failed_ticks[symbol] = 0
+            return self.sources[symbol]
+
+    def get_stats(self):
+        return {
+            "sent_ticks": dict(self.sent_ticks),
+            "failed_ticks": dict(self.failed_ticks),
+            "errors_sent": self.errors_sent,
+            "disconnects": self.disconnects,
+            "connections": self.connections,
+            "paused": self.paused
+        }
+
+    def _accept_loop(self):
+        while self.running:
+            try:
+                conn, _ = self.sock.accept()
+            except OSError:
+                break
+            conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            threading.Thread(target=self._handle_connection, args=(conn,), daemon=True).start()
+
+    # --- Protocolo WebSocket (RFC 6455, mínimo) ---
+    def _handshake(self, conn):
+        data = b""
+        while b"\r\n\r\n" not in data:
+            chunk = conn.recv(4096)
+            if not chunk:
+                return False
+            data += chunk
+        headers = data.decode("latin-1").split("\r\n")
+        key = None
+        for line in headers[1:]:
+            if line.lower().startswith("sec-websocket-key:"):
+                key = line.split(":", 1)[1].strip()
+
+        if key is None:
+            # Petición HTTP normal: control del stub o self_ping a /health
+            path = headers[0].split(" ")[1] if len(headers[0].split(" ")) > 1 else "/"
+            if path == "/pause":
+                self.paused = True
+            elif path == "/resume":
+                self.paused = False
+            if path in ("/stats", "/pause", "/resume"):
+                body = json.dumps(self.get_stats()).encode()
+            else:
+                body = json.dumps({"status": "healthy", "stub": True}).encode()
+            conn.sendall(b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                         b"Content-Length: " + str(len(body)).encode() +
+                         b"\r\nConnection: close\r\n\r\n" + body)
+            return False
+
+        accept = base64.b64encode(hashlib.sha1((key + WS_GUID).encode()).digest()).decode()
+        conn.sendall((
+            "HTTP/1.1 101 Switching Protocols\r\n"
+            "Upgrade: websocket\r\n"
+            "Connection: Upgrade\r\n"
+            f"Sec-WebSocket-Accept: {accept}\r\n\r\n"
+        ).encode())
+        return True
+
+    @staticmethod
+    def _recv_exact(conn, n):
+        data = b""
+        while len(data) < n:
+            chunk = conn.recv(n - len(data))
+            if not chunk:
+                raise ConnectionError("Conexión cerrada por el cliente")
+            data += chunk
+        return data
+
+    def _read_frame(self, conn):
+        b0, b1 = self._recv_exact(conn, 2)
+        opcode = b0 & 0x0F
+        length = b1 & 0x7F
+        if length == 126:
+            length = struct.unpack(">H", self._recv_exact(conn, 2))[0]
+        elif length == 127:
+            length = struct.unpack(">Q", self._recv_exact(conn, 8))[0]
+        mask = self._recv_exact(conn, 4) if b1 & 0x80 else None
+        payload = self._recv_exact(conn, length)
+        if mask:
+            payload = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+        return opcode, payload
+
+    @staticmethod
+    def _encode_frame(payload, opcode=0x1):
+        if isinstance(payload, str):
+            payload = payload.encode()
+        length = len(payload)
+        if length < 126:
+            header = struct.pack(">BB", 0x80 | opcode, length)
+        elif length < 65536:
+            header = struct.pack(">BBH", 0x80 | opcode, 126, length)
+        else:
+            header = struct.pack(">BBQ", 0x80 | opcode, 127, length)
+        return header + payload
+
+    # --- Lógica de la API ---
+    def _handle_connection(self, conn):
+        send_lock = threading.Lock()
+        state = {"open": True, "authorized": False, "streams": {}}
+
+        def send(data):
+            with send_lock:
+                conn.sendall(data)
+
+        def close():
+            state["open"] = False
+            try:
+                conn.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            conn.close()
+
+        try:
+            if not self._handshake(conn):
+                conn.close()
+                return
+            self.connections += 1
+
+            if self.disconnect_every:
+                def force_disconnect():
+                    if state["open"]:
+                        self.disconnects += 1
+                        close()
+                timer = threading.Timer(self.disconnect_every, force_disconnect)
+                timer.daemon = True
+                timer.start()
+
+            while state["open"]:
+                opcode, payload = self._read_frame(conn)
+                if opcode == 0x8:
+                    send(self._encode_frame(payload[:2], 0x8))
+                    break
+                if opcode == 0x9:
+                    send(self._encode_frame(payload, 0xA))
+                    continue
+                if opcode != 0x1:
+                    continue
+                self._handle_request(json.loads(payload), state, send)
+        except (ConnectionError, OSError, ValueError):
+            pass
+        finally:
+            if state["open"]:
+                close()
+
+    def _handle_request(self, request, state, send):
+        if "authorize" in request:
+            if self.valid_token is not None and request["authorize"] != self.valid_token:
+                send(self._encode_frame(json.dumps({
+                    "echo_req": request,
+                    "error": {"code": "InvalidToken", "message": "The token is invalid."},
+                    "msg_type": "authorize"
+                })))
+                return
+            state["authorized"] = True
+            send(self._encode_frame(json.dumps({
+                "authorize": {"loginid": "VRTC0000000", "currency": "USD", "is_virtual": 1},
+                "echo_req": request,
+                "msg_type": "authorize"
+            })))
+        elif "ticks" in request:
+            symbol = request["ticks"]
+            if symbol in state["streams"]:
+                send(self._encode_frame(json.dumps({
+                    "echo_req": request,
+                    "error": {"code": "AlreadySubscribed",
+                              "message": f"You are already subscribed to {symbol}."},
+                    "msg_type": "tick"
+                })))
+                return
+            try:
+                self.get_source(symbol)
+            except (ValueError, OSError) as e:
+                send(self._encode_frame(json.dumps({
+                    "echo_req": request,
+                    "error": {"code": "InvalidSymbol", "message": str(e)},
+                    "msg_type": "tick"
+                })))
+                return
+            subscription_id = hashlib.md5(f"{symbol}{time.time()}".encode()).hexdigest()
+            state["streams"][symbol] = subscription_id
+            threading.Thread(target=self._stream_ticks,
+                             args=(symbol, subscription_id, request, state, send),
+                             daemon=True).start()
+        elif "forget_all" in request:
+            state["streams"].clear()
+            send(self._encode_frame(json.dumps({
+                "echo_req": request, "forget_all": [], "msg_type": "forget_all"
+            })))
+        elif "ping" in request:
+            send(self._encode_frame(json.dumps({
+                "echo_req": request, "msg_type": "ping", "ping": "pong"
+            })))
+        else:
+            send(self._encode_frame(json.dumps({
+                "echo_req": request,
+                "error": {"code": "UnrecognisedRequest", "message": "Unrecognised request."},
+                "msg_type": "error"
+            })))
+
+    def _stream_ticks(self, symbol, subscription_id, request, state, send):
+        """Envía ticks al ritmo configurado, agrupando en lotes los que ya tocan"""
+        source = self.get_source(symbol)
+        echo_req = {"ticks": symbol, "subscribe": 1}
+        error_frame = self._encode_frame(json.dumps({
+            "echo_req": echo_req,
+            "error": {"code": "RateLimit", "message": "Synthetic injected error."},
+            "msg_type": "tick"
+        }))
+        start = time.perf_counter()
+        sent = 0
+
+        while state["open"] and state["streams"].get(symbol) == subscription_id:
+            if self.paused:
+                # Reiniciar el ritmo para no enviar una ráfaga al reanudar
+                time.sleep(0.05)
+                start = time.perf_counter()
+                sent = 0
+                continue
+
+            now = time.perf_counter()
+            due = int((now - start) * self.rate) - sent
+            if due <= 0:
+                time.sleep(max(0.0005, start + (sent + 1) / self.rate - now))
+                continue
+
+            ticks = source.next_batch(min(due, 1000))
+            if not ticks:
+                break
+            sent_at = time.time()
+            first_seq = self.sent_ticks[symbol]
+            frames = []
+            for seq, (epoch, quote) in enumerate(ticks, first_seq):
+                frames.append(self._encode_frame(json.dumps({
+                    "echo_req": echo_req,
+                    "msg_type": "tick",
+                    "subscription": {"id": subscription_id},
+                    "tick": {
+                        "ask": quote, "bid": quote, "epoch": epoch,
+                        "id": subscription_id, "pip_size": 2,
+                        "quote": quote, "symbol": symbol,
+                        # Campos propios del stub para el harness (huecos y latencia)
+                        "stub_seq": seq,
+                        "stub_sent": sent_at
+                    }
+                })))
+                if self.error_rate and random.random() < self.error_rate:
+                    frames.append(error_frame)
+                    self.errors_sent += 1
+            # La secuencia se consume aunque el envío falle: el cliente verá el hueco
+            self.sent_ticks[symbol] += len(ticks)
+            try:
+                send(b"".join(frames))
+            except OSError:
+                self.failed_ticks[symbol] += len(ticks)
+                break
+            sent += len(ticks)
+
+
+def serve(port_queue=None, **kwargs):
+    """Arranca el stub y bloquea; pensado para ejecutarse en su propio proceso"""
+    server = DerivStubServer(**kwargs).start()
+    if port_queue is not None:
+        port_queue.put(server.port)
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Servidor Deriv local para pruebas")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--rate", type=float, default=1.0, help="Ticks por segundo por símbolo")
+    parser.add_argument("--replay", help="CSV con ticks grabados (epoch, quote[, symbol])")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--disconnect-every", type=float, default=None)
+    args = parser.parse_args()
+
+    serve(host=args.host, port=args.port, rate=args.rate, replay_path=args.replay,
+          error_rate=args.error_rate, disconnect_every=args.disconnect_every)
@@ -0,0 +1,168 @@
+import os
+import glob
+import time
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from main import BOOM1000CandleAnalyzer
+
+CANDLE_COLUMNS = ['timestamp', 'open', 'high', 'low', 'close', 'volume', 'price_change']
+EXPORT_FORMATS = ['npz', 'parquet', 'feather']
+INDICATOR_COLUMNS = ['ema_fast', 'ema_slow', 'ema_trend', 'macd', 'macd_signal', 'macd_hist',
+                     'rsi', 'stoch_k', 'stoch_d', 'atr', 'volume_ma', 'roc', 'adx']
+
+
+class FeatureExporter:
+    """Calcula indicadores y condiciones de analyze_market para cada vela de un histórico
+
+    analyze_market trabaja sobre una ventana deslizante de las últimas `candles.maxlen` velas,
+    así que el valor de cada indicador en una vela depende sólo de esa ventana. Las EMA/MACD y
+    los promedios de Wilder (RSI, ATR) son lineales dentro de la ventana, por lo que su último
+    valor es un producto escalar con un vector de pesos fijo; el resto sólo miran la cola de la
+    ventana. calculate_last_values (el mismo cálculo del análisis por lotes) se aplica a todas
+    las ventanas deslizantes a la vez y el histórico se procesa por bloques con memoria acotada.
+    """
+
+    def __init__(self, analyzer=None, chunk_size=100000, block_rows=1024):
+        self.analyzer = analyzer or BOOM1000CandleAnalyzer(None, autostart=False)
+        self.window = self.analyzer.candles.maxlen
+        self.chunk_size = chunk_size
+        self.block_rows = block_rows
+
+    # --- Cálculo vectorizado ---
+    def compute_full_windows(self, closes, highs, lows, volumes):
+        """Indicadores para cada vela con la ventana completa; devuelve len(closes) - window + 1 filas
+
+        Las ventanas deslizantes son vistas sin copia; calculate_last_values las recibe por
+        sub-bloques de block_rows filas para acotar los temporales (block_rows x window).
+        """
+        windows = [sliding_window_view(x, self.window) for x in (closes, highs, lows, volumes)]
+        n_out = len(windows[0])
+        blocks = [self.analyzer.calculate_last_values(*(w[i:i + self.block_rows] for w in windows))
+                  for i in range(0, n_out, self.block_rows)]
+        return {name: np.concatenate([block[name] for block in blocks]) for name in INDICATOR_COLUMNS}
+
+    def compute_warmup(self, closes, highs, lows, volumes):
+        """Velas iniciales con la ventana aún incompleta: se usa el camino escalar de analyze_market"""
+        a = self.analyzer
+        n = min(len(closes), self.window - 1)
+        ind = {name: np.full(n, np.nan) for name in INDICATOR_COLUMNS}
+        for t in range(a.min_candles - 1, n):
+            values = a.calculate_indicators(closes[:t+1], highs[:t+1], lows[:t+1], volumes[:t+1])
+            for name in INDICATOR_COLUMNS:
+                ind[name][t] = values[name][-1]
+        return ind
+
+    def compute_chunk(self, candles, history=None):
+        """Calcula las columnas de un bloque de velas; history son las window-1 velas previas"""
+        # Mientras el historial no llene una ventana seguimos en el calentamiento inicial
+        warming_up = history is None or len(history) < self.window - 1
+        data = candles if history is None else pd.concat([history, candles], ignore_index=True)
+        closes = data['close'].to_numpy(dtype=float)
+        highs = data['high'].to_numpy(dtype=float)
+        lows = data['low'].to_numpy(dtype=float)
+        volumes = data['volume'].to_numpy(dtype=float)
+
+        parts = []
+        if warming_up:
+            parts.append(self.compute_warmup(closes, highs, lows, volumes))
+        if len(closes) >= self.window:
+            parts.append(self.compute_full_windows(closes, highs, lows, volumes))
+        # Las velas del bloque son las últimas filas ([-len(candles):] fallaría con 0 velas)
+        ind = {}
+        for name in INDICATOR_COLUMNS:
+            values = np.concatenate([p[name] for p in parts])
+            ind[name] = values[len(values) - len(candles):]
+
+        columns = {name: candles[name].to_numpy() for name in CANDLE_COLUMNS}
+        columns.update(ind)
+        columns['n_candles'] = np.minimum(np.arange(1, len(data) + 1), self.window)[len(data) - len(candles):]
+        columns.update(self.analyzer.evaluate_conditions(columns))
+        return columns
+
+    # --- Lectura y escritura por bloques ---
+    def iter_candles(self, source):
+        """Acepta un CSV de velas, un DataFrame o un iterable de DataFrames"""
+        if isinstance(source, str):
+            chunks = pd.read_csv(source, chunksize=self.chunk_size)
+        elif isinstance(source, pd.DataFrame):
+            chunks = (source.iloc[i:i + self.chunk_size] for i in range(0, len(source), self.chunk_size))
+        else:
+            chunks = source
+
+        for chunk in chunks:
+            if len(chunk) == 0:
+                continue
+            chunk = chunk.reset_index(drop=True)
+            if 'price_change' not in chunk.columns:
+                chunk['price_change'] = (chunk['close'] - chunk['open']) / chunk['open'] * 100
+            yield chunk
+
+    def export(self, source, out_dir, fmt="npz"):
+        """Escribe un fichero columnar por bloque en out_dir (npz, parquet o feather)
+
+        Las partes de una exportación anterior se borran para que load_features no las mezcle.
+        """
+        # Validar el formato antes de crear nada ni calcular el primer bloque
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(f"Formato no soportado: {fmt}")
+        if fmt in ("parquet", "feather"):
+            try:
+                import pyarrow  # noqa: F401
+            except ImportError:
+                raise ImportError(f"El formato {fmt} requiere pyarrow (pip install pyarrow)")
+
+        os.makedirs(out_dir, exist_ok=True)
+        for stale in glob.glob(os.path.join(out_dir, "part-*")):
+            os.remove(stale)
+        start_time = time.time()
+        history = None
+        total = 0
+
+        for part, candles in enumerate(self.iter_candles(source)):
+            columns = self.compute_chunk(candles, history)
+            path = os.path.join(out_dir, f"part-{part:05d}.{fmt}")
+            if fmt == "npz":
+                np.savez(path, **columns)
+            elif fmt == "parquet":
+                pd.DataFrame(columns).to_parquet(path, index=False)
+            else:
+                pd.DataFrame(columns).to_feather(path)
+
+            keep = self.window - 1
+            previous = candles if history is None else pd.concat([history, candles], ignore_index=True)
+            history = previous.iloc[-keep:].reset_index(drop=True)
+            total += len(candles)
+            print(f"💾 {path}: {len(candles)} velas ({total} en total)")
+
+        print(f"✅ Exportadas {total} velas en {time.time() - start_time:.1f}s a {out_dir}")
+        return total
+
+
+def load_features(out_dir, columns=None):
+    """Carga las partes exportadas en un único DataFrame (opcionalmente sólo algunas columnas)"""
+    frames = []
+    for path in sorted(glob.glob(os.path.join(out_dir, "part-*"))):
+        if path.endswith(".npz"):
+            with np.load(path) as data:
+                names = columns or data.files
+                frames.append(pd.DataFrame({name: data[name] for name in names}))
+        elif path.endswith(".parquet"):
+            frames.append(pd.read_parquet(path, columns=columns))
+        elif path.endswith(".feather"):
+            frames.append(pd.read_feather(path, columns=columns))
+    return pd.concat(frames, ignore_index=True)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Exporta indicadores y condiciones para cada vela del histórico")
+    parser.add_argument("candles", help="CSV de velas (timestamp, open, high, low, close, volume[, price_change])")
+    parser.add_argument("out_dir")
+    parser.add_argument("--format", choices=EXPORT_FORMATS, default="npz")
+    parser.add_argument("--chunk-size", type=int, default=100000)
+    args = parser.parse_args()
+
+    FeatureExporter(chunk_size=args.chunk_size).export(args.candles, args.out_dir, fmt=args.format)
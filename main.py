@@ -3,8 +3,11 @@ import json
 import threading
 import time
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
 from datetime import datetime
 import ssl
+import bisect
+import heapq
 from collections import deque
 import requests
 from flask import Flask, jsonify
@@ -12,16 +15,152 @@ import atexit
 
 app = Flask(__name__)
 
+class SignalOutcomeTracker:
+    """Sigue las señales abiertas tick a tick y las marca como ganadas, perdidas o expiradas
+
+    Las posiciones abiertas se guardan por símbolo en índices ordenados por nivel de TP y
+    de SL, de modo que cada tick cuesta una búsqueda binaria más las posiciones cruzadas.
+    Puede compartirse entre varios analizadores (uno por símbolo).
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        # symbol -> ([niveles ordenados], [ids en el mismo orden])
+        self.tp_index = {}
+        self.sl_index = {}
+        # symbol -> heap de (expira_en, id)
+        self.expiries = {}
+        self.open_positions = {}
+        self.next_id = 1
+        self.stats = {}
+
+    def _symbol_stats(self, symbol):
+        if symbol not in self.stats:
+            self.stats[symbol] = {'open': 0, 'won': 0, 'lost': 0, 'expired': 0, 'pnl': 0.0}
+        return self.stats[symbol]
+
+    @staticmethod
+    def _insert(index, symbol, level, position_id):
+        levels, ids = index.setdefault(symbol, ([], []))
+        i = bisect.bisect_right(levels, level)
+        levels.insert(i, level)
+        ids.insert(i, position_id)
+
+    @staticmethod
+    def _remove(index, symbol, level, position_id):
+        levels, ids = index[symbol]
+        i = bisect.bisect_left(levels, level)
+        while ids[i] != position_id:
+            i += 1
+        del levels[i]
+        del ids[i]
+
+    def open_signal(self, symbol, signal, opened_at, expiry_seconds, recent_prices=()):
+        """Registra una señal BUY con sus niveles 'tp' y 'sl'; el dict se actualiza al cerrarse
+
+        recent_prices son los ticks llegados desde el cierre de la vela de entrada hasta ahora:
+        se comprueban contra la nueva posición para no perder un TP/SL tocado mientras se analizaba.
+        Puede ser la lista viva del analizador: se copia con el lock tomado, así cada tick está en
+        la copia o llega después a on_tick, que espera al lock y ya ve la posición.
+        """
+        with self.lock:
+            recent_prices = list(recent_prices)
+            position_id = self.next_id
+            self.next_id += 1
+            signal.update({'symbol': symbol, 'status': 'open', 'opened_at': opened_at,
+                           'expires_at': opened_at + expiry_seconds})
+            self.open_positions[position_id] = signal
+            self._insert(self.tp_index, symbol, signal['tp'], position_id)
+            self._insert(self.sl_index, symbol, signal['sl'], position_id)
+            heapq.heappush(self.expiries.setdefault(symbol, []), (signal['expires_at'], position_id))
+            self._symbol_stats(symbol)['open'] += 1
+            # Las posiciones anteriores ya vieron estos ticks, así que sólo afectan a la nueva
+            for price in recent_prices:
+                self._process_tick(symbol, price, opened_at)
+            return position_id
+
+    def _close(self, position_id, status, exit_price, epoch):
+        signal = self.open_positions.pop(position_id)
+        symbol = signal['symbol']
+        # Quitar la posición del índice que no se ha cruzado
+        if status != 'won':
+            self._remove(self.tp_index, symbol, signal['tp'], position_id)
+        if status != 'lost':
+            self._remove(self.sl_index, symbol, signal['sl'], position_id)
+
+        pnl = exit_price - signal['price']
+        signal.update({'status': status, 'exit_price': exit_price, 'closed_at': epoch, 'pnl': pnl})
+        stats = self._symbol_stats(symbol)
+        stats['open'] -= 1
+        stats[status] += 1
+        stats['pnl'] += pnl
+
+        status_text = {'won': "🎯 TP alcanzado", 'lost': "🛑 SL alcanzado", 'expired': "⌛ Señal expirada"}
+        print(f"{status_text[status]} en {symbol}: entrada {signal['price']:.2f} → salida {exit_price:.2f} "
+              f"(P&L {pnl:+.2f})")
+
+    def on_tick(self, symbol, price, epoch):
+        """Cierra las posiciones del símbolo cuyo TP o SL cruza este tick, o que han expirado"""
+        with self.lock:
+            # Comprobado dentro del lock para no saltarse la primera posición mientras se registra
+            if symbol not in self.tp_index:
+                return
+            self._process_tick(symbol, price, epoch)
+
+    def _process_tick(self, symbol, price, epoch):
+        # TP por encima de la entrada: se cruzan todos los niveles <= precio
+        levels, ids = self.tp_index[symbol]
+        crossed = bisect.bisect_right(levels, price)
+        if crossed:
+            won = list(zip(levels[:crossed], ids[:crossed]))
+            del levels[:crossed]
+            del ids[:crossed]
+            for level, position_id in won:
+                self._close(position_id, 'won', level, epoch)
+
+        # SL por debajo de la entrada: se cruzan todos los niveles >= precio.
+        # Si el tick salta el SL (spike bajista en CRASH) la salida es el precio real, no el nivel
+        levels, ids = self.sl_index[symbol]
+        crossed = bisect.bisect_left(levels, price)
+        if crossed < len(levels):
+            lost = list(zip(levels[crossed:], ids[crossed:]))
+            del levels[crossed:]
+            del ids[crossed:]
+            for level, position_id in lost:
+                self._close(position_id, 'lost', min(level, price), epoch)
+
+        # Expiradas: se liquidan al precio actual (las ya cerradas se descartan al salir del heap)
+        expiries = self.expiries[symbol]
+        while expiries and expiries[0][0] <= epoch:
+            _, position_id = heapq.heappop(expiries)
+            if position_id in self.open_positions:
+                self._close(position_id, 'expired', price, epoch)
+
+    def get_stats(self):
+        with self.lock:
+            total = {'open': 0, 'won': 0, 'lost': 0, 'expired': 0, 'pnl': 0.0}
+            for stats in self.stats.values():
+                for key in total:
+                    total[key] += stats[key]
+            closed = total['won'] + total['lost'] + total['expired']
+            total['win_rate'] = total['won'] / closed * 100 if closed else 0
+            total['avg_pnl'] = total['pnl'] / closed if closed else 0
+            return {'total': total, 'by_symbol': {k: dict(v) for k, v in self.stats.items()}}
+
+
 class BOOM1000CandleAnalyzer:
-    def __init__(self, token, app_id="88258", telegram_token=None, telegram_chat_id=None):
+    def __init__(self, token, app_id="88258", telegram_token=None, telegram_chat_id=None,
+                 symbol="BOOM1000", ws_url=None, service_url=None, autostart=True,
+                 outcome_tracker=None):
         # --- Configuración de Conexión ---
-        self.ws_url = f"wss://ws.derivws.com/websockets/v3?app_id={app_id}"
+        # ws_url/service_url permiten apuntar a un servidor local (ver deriv_stub.py)
+        self.ws_url = ws_url or f"wss://ws.derivws.com/websockets/v3?app_id={app_id}"
         self.token = token
         self.ws = None
         self.connected = False
         self.authenticated = False
         self.last_reconnect_time = time.time()
-        self.service_url = "https://boom-1000-index-se-ales.onrender.com"
+        self.service_url = service_url or "https://boom-1000-index-se-ales.onrender.com"
 
         # --- Configuración de Telegram ---
         self.telegram_token = telegram_token
@@ -29,7 +168,7 @@ class BOOM1000CandleAnalyzer:
         self.telegram_enabled = telegram_token is not None and telegram_chat_id is not None
 
         # --- Configuración de Trading ---
-        self.symbol = "BOOM1000"
+        self.symbol = symbol
         self.candle_interval_seconds = 60
         self.min_candles = 50
 
@@ -48,14 +187,22 @@ class BOOM1000CandleAnalyzer:
         self.sl_atr_multiplier = 2.5
         self.tp_atr_multiplier = 3.5
         self.volume_ma_period = 20
+        self.roc_period = 5
+        self.adx_period = 14
         self.min_volume_ratio = 1.2
         self.min_price_change = 0.5
 
         # --- Almacenamiento de Datos ---
         self.ticks_for_current_candle = []
         self.candles = deque(maxlen=200)
+        # Copia de las velas en un buffer circular duplicado (campos x 2*maxlen): la ventana
+        # de las últimas velas es siempre un slice contiguo, sin recorrer los dicts
+        self.candle_fields = ['open', 'high', 'low', 'close', 'volume', 'price_change']
+        self.candle_buffer = np.zeros((len(self.candle_fields), 2 * self.candles.maxlen))
+        self.candle_count = 0
         self.last_candle_timestamp = 0
         self.new_candle_ready = False
+        self._indicator_weights = {}
 
         # --- Estado de Señales ---
         self.last_signal_time = 0
@@ -64,10 +211,18 @@ class BOOM1000CandleAnalyzer:
         self.signals_history = []
         self.consecutive_signals = 0
         self.max_consecutive_signals = 3
+        # Si un BatchCandleAnalyzer gestiona este analizador, el análisis se hace por lotes
+        self.batched = False
 
-        # Iniciar en un hilo separado
+        # --- Seguimiento de resultados (TP/SL) ---
+        # Se puede pasar un tracker compartido cuando hay varios símbolos
+        self.outcome_tracker = outcome_tracker or SignalOutcomeTracker()
+        self.signal_expiry_seconds = self.candle_interval_seconds * 30
+
+        # Iniciar en un hilo separado (autostart=False para uso offline, p. ej. feature_export.py)
         self.thread = threading.Thread(target=self.run_analyzer, daemon=True)
-        self.thread.start()
+        if autostart:
+            self.thread.start()
 
     def self_ping(self):
         """Función para hacerse ping a sí mismo y evitar que Render duerma el servicio"""
@@ -280,13 +435,130 @@ class BOOM1000CandleAnalyzer:
         indicators['volume_ma'] = self.calculate_sma(volumes, self.volume_ma_period)
         
         # ROC
-        indicators['roc'] = self.calculate_roc(closes, 5)
+        indicators['roc'] = self.calculate_roc(closes, self.roc_period)
         
         # ADX (simplificado)
-        indicators['adx'] = self.calculate_adx(highs, lows, closes, 14)
+        indicators['adx'] = self.calculate_adx(highs, lows, closes, self.adx_period)
         
         return indicators
 
+    def _ema_matrix(self, length, period):
+        """Matriz M tal que calculate_ema(x, period) == M @ x (la EMA es lineal en los precios)"""
+        if length < period:
+            return np.full((length, length), np.nan)
+
+        matrix = np.zeros((length, length))
+        k = 2 / (period + 1)
+        matrix[period-1, :period] = 1 / period
+        for i in range(period, length):
+            matrix[i] = matrix[i-1] * (1 - k)
+            matrix[i, i] += k
+        return matrix
+
+    @staticmethod
+    def _wilder_weights(length, period):
+        """Pesos del último valor de un promedio de Wilder sembrado con la media de los primeros period"""
+        c = (period - 1) / period
+        weights = np.empty(length)
+        weights[:period] = c ** (length - period) / period
+        weights[period:] = c ** np.arange(length - period - 1, -1, -1) / period
+        return weights
+
+    def calculate_indicator_weights(self, length):
+        """Pesos w tales que el último valor de cada indicador lineal es x @ w
+
+        Para EMA/MACD x son los cierres de la ventana; para RSI las ganancias/pérdidas
+        (np.diff de los cierres) y para ATR el True Range desde la segunda vela.
+        """
+        key = (length, self.ema_fast_period, self.ema_slow_period, self.ema_trend_period,
+               self.macd_fast, self.macd_slow, self.macd_signal, self.rsi_period, self.atr_period)
+        if key in self._indicator_weights:
+            return self._indicator_weights[key]
+
+        weights = {
+            'ema_fast': self._ema_matrix(length, self.ema_fast_period)[-1],
+            'ema_slow': self._ema_matrix(length, self.ema_slow_period)[-1],
+            'ema_trend': self._ema_matrix(length, self.ema_trend_period)[-1],
+        }
+        if length < self.macd_slow + self.macd_signal:
+            weights['macd'] = weights['macd_signal'] = weights['macd_hist'] = np.zeros(length)
+        else:
+            macd_matrix = self._ema_matrix(length, self.macd_fast) - self._ema_matrix(length, self.macd_slow)
+            weights['macd'] = macd_matrix[-1]
+            weights['macd_signal'] = self._ema_matrix(length, self.macd_signal)[-1] @ macd_matrix
+            weights['macd_hist'] = weights['macd'] - weights['macd_signal']
+        weights['rsi'] = self._wilder_weights(length - 1, self.rsi_period)
+        weights['atr'] = self._wilder_weights(length - 1, self.atr_period)
+
+        self._indicator_weights[key] = weights
+        return weights
+
+    @staticmethod
+    def _rolling_mean(values, period):
+        return sliding_window_view(values, period, axis=-1).mean(axis=-1)
+
+    def calculate_last_values(self, closes, highs, lows, volumes):
+        """Último valor de cada indicador para ventanas apiladas en arrays (..., tiempo)
+
+        Equivale a calculate_indicators(...)[name][-1] de cada ventana por separado: una fila por
+        símbolo en el análisis por lotes o una ventana deslizante por vela en la exportación.
+        La ventana debe cubrir todos los periodos (ver BatchCandleAnalyzer.min_batch_length).
+        """
+        weights = self.calculate_indicator_weights(closes.shape[-1])
+        ind = {}
+
+        # EMA y MACD: lineales en los cierres
+        for name in ['ema_fast', 'ema_slow', 'ema_trend', 'macd', 'macd_signal', 'macd_hist']:
+            ind[name] = closes @ weights[name]
+
+        # RSI: promedios de Wilder de ganancias y pérdidas
+        deltas = np.diff(closes, axis=-1)
+        avg_gain = np.maximum(deltas, 0) @ weights['rsi']
+        avg_loss = np.maximum(-deltas, 0) @ weights['rsi']
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ind['rsi'] = np.where(avg_loss == 0, 100.0, 100 - (100 / (1 + avg_gain / avg_loss)))
+
+        # ATR: promedio de Wilder del True Range (np.maximum anidado evita apilar los tres términos)
+        prev_closes = closes[..., :-1]
+        cur_highs = highs[..., 1:]
+        cur_lows = lows[..., 1:]
+        tr = np.maximum(cur_highs - cur_lows,
+                        np.maximum(np.abs(cur_highs - prev_closes), np.abs(cur_lows - prev_closes)))
+        ind['atr'] = tr @ weights['atr']
+
+        # Estocástico: sólo hacen falta las últimas stoch_slow + stoch_d - 1 líneas K
+        n_k = self.stoch_slow + self.stoch_d - 1
+        span = self.stoch_k + n_k - 1
+        highest_high = sliding_window_view(highs[..., -span:], self.stoch_k, axis=-1).max(axis=-1)
+        lowest_low = sliding_window_view(lows[..., -span:], self.stoch_k, axis=-1).min(axis=-1)
+        price_range = highest_high - lowest_low
+        with np.errstate(divide='ignore', invalid='ignore'):
+            raw_k = np.where(price_range != 0,
+                             100 * (closes[..., -n_k:] - lowest_low) / price_range, 50.0)
+        stoch_k = self._rolling_mean(raw_k, self.stoch_slow)
+        ind['stoch_k'] = stoch_k[..., -1]
+        ind['stoch_d'] = stoch_k[..., -self.stoch_d:].mean(axis=-1)
+
+        # Media de volumen y ROC
+        ind['volume_ma'] = volumes[..., -self.volume_ma_period:].mean(axis=-1)
+        previous = closes[..., -(self.roc_period + 1)]
+        ind['roc'] = 100 * (closes[..., -1] - previous) / previous
+
+        # ADX (simplificado, igual que calculate_adx): media de los últimos adx_period DX
+        tail = 2 * self.adx_period
+        up_move = np.diff(highs[..., -tail:], axis=-1)
+        down_move = -np.diff(lows[..., -tail:], axis=-1)
+        plus_dm = np.where((up_move > down_move) & (up_move > 0), up_move, 0)
+        minus_dm = np.where((down_move > up_move) & (down_move > 0), down_move, 0)
+        plus_sma = self._rolling_mean(plus_dm, self.adx_period)
+        minus_sma = self._rolling_mean(minus_dm, self.adx_period)
+        di_sum = plus_sma + minus_sma
+        with np.errstate(divide='ignore', invalid='ignore'):
+            dx = np.where(di_sum > 0, 100 * np.abs(plus_sma - minus_sma) / di_sum, 0.0)
+        ind['adx'] = dx.mean(axis=-1)
+
+        return ind
+
     # --- Método para enviar mensajes a Telegram ---
     def send_telegram_message(self, message):
         if not self.telegram_enabled:
@@ -392,6 +664,7 @@ class BOOM1000CandleAnalyzer:
                 self.last_candle_timestamp = current_candle_start_time
 
             self.ticks_for_current_candle.append(price)
+            self.outcome_tracker.on_tick(self.symbol, price, timestamp)
 
         except Exception as e:
             print(f"❌ Error en handle_tick: {e}")
@@ -410,13 +683,30 @@ class BOOM1000CandleAnalyzer:
             'volume': len(prices),
             'price_change': ((prices[-1] - prices[0]) / prices[0]) * 100
         }
-        self.candles.append(candle)
+        self.append_candle(candle)
         self.ticks_for_current_candle = []
         self.new_candle_ready = True
 
         if len(self.candles) >= self.min_candles:
             print(f"🕯️ Nueva vela cerrada. Total: {len(self.candles)}. Precio Cierre: {candle['close']:.2f}")
 
+    def append_candle(self, candle):
+        """Añade una vela cerrada al historial y al buffer circular"""
+        self.candles.append(candle)
+        size = self.candles.maxlen
+        i = self.candle_count % size
+        values = [candle[field] for field in self.candle_fields]
+        self.candle_buffer[:, i] = values
+        self.candle_buffer[:, i + size] = values
+        self.candle_count += 1
+
+    def candle_window(self, length=None):
+        """Vista (campos x length) de las últimas velas, en el orden de candle_fields"""
+        size = self.candles.maxlen
+        length = length or min(self.candle_count, size)
+        end = (self.candle_count - 1) % size + size + 1
+        return self.candle_buffer[:, end - length:end]
+
     def analyze_market(self):
         if len(self.candles) < self.min_candles:
             print(f"\r⏳ Recopilando velas iniciales: {len(self.candles)}/{self.min_candles}", end="")
@@ -433,69 +723,36 @@ class BOOM1000CandleAnalyzer:
         try:
             # Calcular todos los indicadores MANUALMENTE
             indicators = self.calculate_indicators(closes, highs, lows, volumes)
-            ema_fast = indicators['ema_fast']
-            ema_slow = indicators['ema_slow']
-            ema_trend = indicators['ema_trend']
-            macd = indicators['macd']
-            macd_signal = indicators['macd_signal']
-            macd_hist = indicators['macd_hist']
-            rsi = indicators['rsi']
-            stoch_k = indicators['stoch_k']
-            stoch_d = indicators['stoch_d']
-            atr = indicators['atr']
-            volume_ma = indicators['volume_ma']
-            roc = indicators['roc']
-            adx = indicators['adx']
         except Exception as e:
             print(f"❌ Error calculando indicadores: {e}")
             return
 
-        # Verificar si tenemos suficientes datos para análisis
-        valid_data = (
-            len(closes) >= self.ema_trend_period and
-            not np.isnan(ema_fast[-1]) and
-            not np.isnan(ema_slow[-1]) and
-            not np.isnan(rsi[-1]) and
-            not np.isnan(atr[-1])
-        )
-        
-        if not valid_data:
-            return
-
-        last_close = closes[-1]
-        last_atr = atr[-1]
-        current_volume = volumes[-1]
-        current_price_change = price_changes[-1]
-        avg_volume = volume_ma[-1] if not np.isnan(volume_ma[-1]) and volume_ma[-1] > 0 else current_volume
-
-        # Condiciones de tendencia
-        is_strong_uptrend = (
-            ema_fast[-1] > ema_slow[-1] and
-            ema_slow[-1] > ema_trend[-1] and
-            closes[-1] > ema_trend[-1]
-        )
-
-        # Condiciones de momentum
-        macd_bullish = macd[-1] > macd_signal[-1] and macd_hist[-1] > 0
-        strong_momentum = roc[-1] > 1.0 if not np.isnan(roc[-1]) else False
-
-        # Condiciones de RSI
-        rsi_ok = rsi[-1] > 50 and rsi[-1] < 75 if not np.isnan(rsi[-1]) else False
-
-        # Estocástico
-        stoch_bullish = (
-            stoch_k[-1] > stoch_d[-1] and 
-            stoch_k[-1] > 50 if not np.isnan(stoch_k[-1]) and not np.isnan(stoch_d[-1]) else False
-        )
+        # Últimos valores de cada indicador (mismo formato que usa el análisis por lotes)
+        values = {name: series[-1] for name, series in indicators.items()}
+        values.update({
+            'close': closes[-1],
+            'volume': volumes[-1],
+            'price_change': price_changes[-1],
+            'n_candles': len(closes)
+        })
+        self.process_signal(values)
 
-        # Fuerza de tendencia
-        strong_trend = adx[-1] > 25 if not np.isnan(adx[-1]) else True
+    def process_signal(self, values):
+        """Evalúa las condiciones sobre los últimos valores de los indicadores y emite la señal"""
+        conditions = self.evaluate_conditions(values)
 
-        # Condiciones de volumen
-        volume_ok = current_volume > avg_volume * self.min_volume_ratio
+        # Verificar si tenemos suficientes datos para análisis
+        if not conditions['valid_data']:
+            return
 
-        # Condición de spike
-        price_spike = current_price_change > self.min_price_change
+        last_close = values['close']
+        last_atr = values['atr']
+        current_volume = values['volume']
+        current_price_change = values['price_change']
+        volume_ma = values['volume_ma']
+        avg_volume = volume_ma if not np.isnan(volume_ma) and volume_ma > 0 else current_volume
+        rsi, stoch_k, stoch_d = values['rsi'], values['stoch_k'], values['stoch_d']
+        macd, roc, adx = values['macd'], values['roc'], values['adx']
 
         signal = None
         current_time = time.time()
@@ -504,13 +761,7 @@ class BOOM1000CandleAnalyzer:
             return
 
         # Señal de COMPRA (BUY)
-        if (is_strong_uptrend and
-            macd_bullish and
-            rsi_ok and
-            stoch_bullish and
-            volume_ok and
-            (price_spike or strong_momentum) and
-            strong_trend):
+        if conditions['buy_setup']:
 
             if (self.last_signal is None or
                 self.last_signal['direction'] != 'BUY' or
@@ -528,37 +779,87 @@ class BOOM1000CandleAnalyzer:
                 'direction': signal,
                 'price': last_close,
                 'atr': last_atr,
-                'rsi': rsi[-1] if not np.isnan(rsi[-1]) else 50,
-                'stoch_k': stoch_k[-1] if not np.isnan(stoch_k[-1]) else 50,
-                'stoch_d': stoch_d[-1] if not np.isnan(stoch_d[-1]) else 50,
-                'macd': macd[-1] if not np.isnan(macd[-1]) else 0,
-                'roc': roc[-1] if not np.isnan(roc[-1]) else 0,
-                'adx': adx[-1] if not np.isnan(adx[-1]) else 0,
+                'rsi': rsi if not np.isnan(rsi) else 50,
+                'stoch_k': stoch_k if not np.isnan(stoch_k) else 50,
+                'stoch_d': stoch_d if not np.isnan(stoch_d) else 50,
+                'macd': macd if not np.isnan(macd) else 0,
+                'roc': roc if not np.isnan(roc) else 0,
+                'adx': adx if not np.isnan(adx) else 0,
                 'volume_ratio': current_volume / avg_volume if avg_volume > 0 else 1,
                 'price_change': current_price_change,
+                'sl': last_close - (last_atr * self.sl_atr_multiplier),
+                'tp': last_close + (last_atr * self.tp_atr_multiplier),
                 'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
             }
             self.signals_history.append(self.last_signal)
+            self.outcome_tracker.open_signal(self.symbol, self.last_signal,
+                                             self.last_candle_timestamp, self.signal_expiry_seconds,
+                                             recent_prices=self.ticks_for_current_candle)
 
-            self.display_signal(signal, last_close, last_atr, rsi[-1],
-                               stoch_k[-1], stoch_d[-1], macd[-1],
+            self.display_signal(signal, last_close, last_atr, rsi,
+                               stoch_k, stoch_d, macd,
                                current_volume / avg_volume if avg_volume > 0 else 1,
-                               roc[-1], adx[-1], current_price_change)
+                               roc, adx, current_price_change,
+                               self.last_signal['sl'], self.last_signal['tp'])
 
             if self.telegram_enabled:
                 telegram_msg = self.format_telegram_message(
-                    signal, last_close, last_atr, rsi[-1],
-                    stoch_k[-1], stoch_d[-1], macd[-1],
+                    signal, last_close, last_atr, rsi,
+                    stoch_k, stoch_d, macd,
                     current_volume / avg_volume if avg_volume > 0 else 1,
-                    roc[-1], adx[-1], current_price_change
+                    roc, adx, current_price_change,
+                    self.last_signal['sl'], self.last_signal['tp']
                 )
                 self.send_telegram_message(telegram_msg)
 
+    def evaluate_conditions(self, ind):
+        """Evalúa las condiciones de analyze_market elemento a elemento sobre arrays de indicadores
+
+        Acepta escalares o arrays de cualquier forma (una columna por vela, una fila por símbolo...).
+        No incluye el cooldown ni el límite de señales consecutivas, que dependen del estado en vivo.
+        """
+        closes = np.asarray(ind['close'], dtype=float)
+        volumes = np.asarray(ind['volume'], dtype=float)
+        volume_ma = np.asarray(ind['volume_ma'], dtype=float)
+        adx = np.asarray(ind['adx'], dtype=float)
+
+        with np.errstate(invalid='ignore'):
+            conditions = {}
+            conditions['valid_data'] = (
+                (np.asarray(ind['n_candles']) >= max(self.min_candles, self.ema_trend_period)) &
+                ~np.isnan(ind['ema_fast']) & ~np.isnan(ind['ema_slow']) &
+                ~np.isnan(ind['rsi']) & ~np.isnan(ind['atr'])
+            )
+            conditions['is_strong_uptrend'] = (
+                (ind['ema_fast'] > ind['ema_slow']) &
+                (ind['ema_slow'] > ind['ema_trend']) &
+                (closes > ind['ema_trend'])
+            )
+            conditions['macd_bullish'] = (ind['macd'] > ind['macd_signal']) & (ind['macd_hist'] > 0)
+            conditions['strong_momentum'] = ind['roc'] > 1.0
+            conditions['rsi_ok'] = (ind['rsi'] > 50) & (ind['rsi'] < 75)
+            conditions['stoch_bullish'] = (ind['stoch_k'] > ind['stoch_d']) & (ind['stoch_k'] > 50)
+            conditions['strong_trend'] = np.isnan(adx) | (adx > 25)
+
+            avg_volume = np.where(~np.isnan(volume_ma) & (volume_ma > 0), volume_ma, volumes)
+            conditions['volume_ok'] = volumes > avg_volume * self.min_volume_ratio
+            conditions['price_spike'] = np.asarray(ind['price_change'], dtype=float) > self.min_price_change
+
+        conditions['buy_setup'] = (
+            conditions['valid_data'] &
+            conditions['is_strong_uptrend'] &
+            conditions['macd_bullish'] &
+            conditions['rsi_ok'] &
+            conditions['stoch_bullish'] &
+            conditions['volume_ok'] &
+            (conditions['price_spike'] | conditions['strong_momentum']) &
+            conditions['strong_trend']
+        )
+        return conditions
+
     def format_telegram_message(self, direction, price, atr_value, rsi_value,
                                stoch_k, stoch_d, macd_value, volume_ratio,
-                               roc_value, adx_value, price_change):
-        sl = price - (atr_value * self.sl_atr_multiplier)
-        tp = price + (atr_value * self.tp_atr_multiplier)
+                               roc_value, adx_value, price_change, sl, tp):
         direction_emoji = "📈"
 
         message = f"""
@@ -587,9 +888,7 @@ class BOOM1000CandleAnalyzer:
 
     def display_signal(self, direction, price, atr_value, rsi_value,
                       stoch_k, stoch_d, macd_value, volume_ratio,
-                      roc_value, adx_value, price_change):
-        sl = price - (atr_value * self.sl_atr_multiplier)
-        tp = price + (atr_value * self.tp_atr_multiplier)
+                      roc_value, adx_value, price_change, sl, tp):
         color_code = "\033[92m"
         reset_code = "\033[0m"
 
@@ -659,7 +958,7 @@ class BOOM1000CandleAnalyzer:
                     if self.connect():
                         print("✅ Reconexión exitosa")
                         while self.connected:
-                            if self.new_candle_ready:
+                            if self.new_candle_ready and not self.batched:
                                 self.analyze_market()
                                 self.new_candle_ready = False
                             time.sleep(1)
@@ -714,6 +1013,13 @@ def signals():
         "total_signals": len(analyzer.signals_history)
     })
 
+@app.route('/outcomes')
+def outcomes():
+    if not analyzer:
+        return jsonify({"error": "Analyzer not initialized"})
+
+    return jsonify(analyzer.outcome_tracker.get_stats())
+
 @app.route('/reconnect')
 def manual_reconnect():
     if not analyzer:
@@ -0,0 +1,213 @@
+import argparse
+import multiprocessing
+import os
+import sys
+import random
+import time
+import numpy as np
+import pandas as pd
+import requests
+
+from batch_analysis import BatchCandleAnalyzer
+from deriv_stub import serve
+from main import BOOM1000CandleAnalyzer
+
+
+class TickProbe:
+    """Envuelve handle_tick de un analizador para contar ticks, huecos de secuencia y latencia"""
+
+    def __init__(self, analyzer, reservoir_size=100000):
+        self.analyzer = analyzer
+        self.received = 0
+        self.lost = 0
+        self.expected_seq = 0
+        self.reservoir_size = reservoir_size
+        self.latencies = []
+        self._handle_tick = analyzer.handle_tick
+        analyzer.handle_tick = self.handle_tick
+
+    def handle_tick(self, tick):
+        self._handle_tick(tick)
+        self.received += 1
+
+        # Un salto en stub_seq son ticks que el stub envió y nunca llegaron (p. ej. al desconectar)
+        seq = tick.get('stub_seq')
+        if seq is not None:
+            if seq > self.expected_seq:
+                self.lost += seq - self.expected_seq
+            self.expected_seq = max(self.expected_seq, seq + 1)
+
+        # Latencia desde que el stub (otro proceso) envió el tick hasta que se procesó
+        if 'stub_sent' not in tick:
+            return
+        latency = time.time() - tick['stub_sent']
+        # Muestreo reservoir para que la memoria del harness no crezca con la duración
+        if len(self.latencies) < self.reservoir_size:
+            self.latencies.append(latency)
+        else:
+            j = random.randrange(self.received)
+            if j < self.reservoir_size:
+                self.latencies[j] = latency
+
+
+def rss_mb():
+    """Memoria residente actual del proceso en MB"""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024
+    except (OSError, ValueError, AttributeError):
+        # Sin /proc sólo tenemos el pico vía resource (sólo Unix); en Windows se reporta NaN
+        try:
+            import resource
+        except ImportError:
+            return float('nan')
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def symbol_names(count, base=None):
+    """Nombres de símbolos; los que exceden la base son variantes como BOOM1000_6"""
+    base = base or ["BOOM1000", "CRASH1000", "BOOM500", "CRASH500", "BOOM300", "CRASH300"]
+    names = base[:count]
+    i = 0
+    while len(names) < count:
+        names.append(f"{base[i % len(base)]}_{len(names)}")
+        i += 1
+    return names
+
+
+def start_stub(args):
+    """Lanza el stub en su propio proceso para que no compita por el GIL con los analizadores"""
+    port_queue = multiprocessing.Queue()
+    process = multiprocessing.Process(target=serve, daemon=True, kwargs={
+        'port_queue': port_queue, 'rate': args.rate, 'replay_path': args.replay,
+        'error_rate': args.error_rate, 'disconnect_every': args.disconnect_every, 'seed': args.seed
+    })
+    process.start()
+    port = port_queue.get(timeout=10)
+    return process, f"127.0.0.1:{port}"
+
+
+def stub_request(address, path):
+    return requests.get(f"http://{address}/{path}", timeout=5).json()
+
+
+def tick_counts(stats, probes):
+    """(enviados, recibidos, perdidos por hueco de secuencia, aún en cola)"""
+    sent = sum(stats['sent_ticks'].values())
+    received = sum(p.received for p in probes)
+    lost = sum(p.lost for p in probes)
+    return sent, received, lost, sent - received - lost
+
+
+def drain(address, probes, timeout=60, idle_seconds=5):
+    """Detiene los streams del stub y espera a que los clientes vacíen lo que queda en cola"""
+    stub_request(address, "pause")
+    deadline = time.time() + timeout
+    last_progress = time.time()
+    last_received = -1
+    while time.time() < deadline:
+        time.sleep(0.5)
+        sent, received, lost, backlog = tick_counts(stub_request(address, "stats"), probes)
+        if backlog <= 0:
+            break
+        if received != last_received:
+            last_received = received
+            last_progress = time.time()
+        elif time.time() - last_progress > idle_seconds:
+            break
+
+
+def print_report(stats, probes, elapsed, rss_start, rss_peak, final=False):
+    # Los analizadores pueden estar silenciados; el reporte siempre va a la consola real
+    out = sys.__stdout__
+    sent, received, lost, backlog = tick_counts(stats, probes)
+    latencies = np.concatenate([np.array(p.latencies) for p in probes]) if received else np.array([])
+    rss_now = rss_mb()
+    rss_peak = max(rss_peak, rss_now)
+
+    print("\n" + "="*70, file=out)
+    print(f"📊 {'REPORTE FINAL' if final else 'Reporte'} SOAK TEST - {elapsed:.0f}s", file=out)
+    print("="*70, file=out)
+    print(f"   • Símbolos: {len(probes)} | Conexiones: {stats['connections']} | "
+          f"Desconexiones forzadas: {stats['disconnects']} | Errores inyectados: {stats['errors_sent']}", file=out)
+    print(f"   • Ticks enviados: {sent} | recibidos: {received}", file=out)
+    print(f"   • Perdidos (huecos de secuencia): {lost} ({lost / sent * 100 if sent else 0:.2f}%) | "
+          f"fallos de envío en el stub: {sum(stats['failed_ticks'].values())}", file=out)
+    if final:
+        # Tras detener los streams y drenar, lo que falta no va a llegar
+        print(f"   • No entregados tras drenar: {backlog}", file=out)
+    else:
+        print(f"   • En cola (enviados aún sin procesar): {backlog}", file=out)
+    print(f"   • Throughput sostenido: {received / elapsed if elapsed else 0:.0f} ticks/s", file=out)
+    if len(latencies):
+        p50, p90, p99, p999 = np.percentile(latencies * 1000, [50, 90, 99, 99.9])
+        print(f"   • Latencia (ms): p50={p50:.2f} p90={p90:.2f} p99={p99:.2f} "
+              f"p99.9={p999:.2f} max={latencies.max() * 1000:.2f}", file=out)
+    growth_per_hour = (rss_now - rss_start) / elapsed * 3600 if elapsed else 0
+    print(f"   • Memoria RSS: inicio={rss_start:.1f}MB actual={rss_now:.1f}MB pico={rss_peak:.1f}MB "
+          f"crecimiento={growth_per_hour:+.1f}MB/h", file=out)
+    print(f"   • Velas: {sum(len(p.analyzer.candles) for p in probes)} | "
+          f"Señales: {sum(len(p.analyzer.signals_history) for p in probes)}", file=out)
+    print("="*70, file=out)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de carga del analizador contra un servidor Deriv local")
+    parser.add_argument("--symbols", type=int, default=4, help="Número de símbolos (un analizador por símbolo)")
+    parser.add_argument("--rate", type=float, default=1000.0, help="Ticks por segundo por símbolo")
+    parser.add_argument("--duration", type=float, default=60.0, help="Duración en segundos")
+    parser.add_argument("--report-every", type=float, default=30.0)
+    parser.add_argument("--replay", help="CSV con ticks grabados (epoch, quote[, symbol])")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--disconnect-every", type=float, default=None)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--batched", action="store_true", help="Analizar todos los símbolos por lotes")
+    parser.add_argument("--verbose", action="store_true", help="Mostrar la salida de los analizadores")
+    args = parser.parse_args()
+
+    stub_process, address = start_stub(args)
+
+    print(f"🚀 Soak test: {args.symbols} símbolos x {args.rate:.0f} ticks/s durante {args.duration:.0f}s")
+    # La salida de los analizadores se descarta salvo con --verbose
+    if not args.verbose:
+        sys.stdout = open(os.devnull, "w")
+
+    # Al reproducir un CSV con columna symbol sólo se usan símbolos grabados (y sus variantes)
+    base = None
+    if args.replay:
+        recorded = pd.read_csv(args.replay, nrows=0).columns
+        if 'symbol' in recorded:
+            base = sorted(pd.read_csv(args.replay, usecols=['symbol'])['symbol'].astype(str).unique())
+
+    rss_start = rss_mb()
+    probes = []
+    for symbol in symbol_names(args.symbols, base):
+        analyzer = BOOM1000CandleAnalyzer(
+            "stub-token", symbol=symbol, ws_url=f"ws://{address}",
+            service_url=f"http://{address}"
+        )
+        probes.append(TickProbe(analyzer))
+    if args.batched:
+        BatchCandleAnalyzer([p.analyzer for p in probes]).start()
+
+    start = time.time()
+    last_report = start
+    rss_peak = rss_start
+    try:
+        while time.time() - start < args.duration:
+            time.sleep(1)
+            rss_peak = max(rss_peak, rss_mb())
+            if time.time() - last_report >= args.report_every:
+                last_report = time.time()
+                print_report(stub_request(address, "stats"), probes, last_report - start, rss_start, rss_peak)
+    except KeyboardInterrupt:
+        pass
+
+    drain(address, probes)
+    print_report(stub_request(address, "stats"), probes, time.time() - start, rss_start, rss_peak, final=True)
+    stub_process.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import SignalOutcomeTracker  # noqa: E402
+
+
+def test_gap_through_stop_loss_exits_at_tick_price():
+    tracker = SignalOutcomeTracker()
+    signal = {'price': 100.0, 'tp': 105.0, 'sl': 98.0}
+    tracker.open_signal('CRASH1000', signal, 0, 600)
+
+    tracker.on_tick('CRASH1000', 90.0, 1)
+
+    assert signal['status'] == 'lost'
+    assert signal['exit_price'] == 90.0
+    assert tracker.get_stats()['total']['pnl'] == -10.0
+
+
+def test_ticks_since_candle_close_are_checked_on_open():
+    tracker = SignalOutcomeTracker()
+    signal = {'price': 100.0, 'tp': 105.0, 'sl': 98.0}
+    tracker.open_signal('BOOM1000', signal, 0, 600, recent_prices=[101.0, 106.0])
+
+    assert signal['status'] == 'won'
+    assert signal['exit_price'] == 105.0
+    assert tracker.open_positions == {}
+    assert tracker.tp_index['BOOM1000'] == ([], [])
+    assert tracker.sl_index['BOOM1000'] == ([], [])
+
+
+def test_later_tick_reaching_take_profit_wins_at_level():
+    tracker = SignalOutcomeTracker()
+    signal = {'price': 100.0, 'tp': 105.0, 'sl': 98.0}
+    tracker.open_signal('BOOM1000', signal, 0, 600)
+
+    tracker.on_tick('BOOM1000', 104.9, 1)
+    assert signal['status'] == 'open'
+
+    tracker.on_tick('BOOM1000', 107.0, 2)
+    assert signal['status'] == 'won'
+    assert signal['exit_price'] == 105.0
+    assert signal['closed_at'] == 2
+    assert signal['pnl'] == 5.0
+
+
+def test_tick_at_stop_loss_level_loses_at_level():
+    tracker = SignalOutcomeTracker()
+    signal = {'price': 100.0, 'tp': 105.0, 'sl': 98.0}
+    tracker.open_signal('BOOM1000', signal, 0, 600)
+
+    tracker.on_tick('BOOM1000', 98.0, 1)
+
+    assert signal['status'] == 'lost'
+    assert signal['exit_price'] == 98.0
+    assert tracker.tp_index['BOOM1000'] == ([], [])
+    assert tracker.sl_index['BOOM1000'] == ([], [])
+
+
+def test_expired_positions_close_at_tick_price_once():
+    tracker = SignalOutcomeTracker()
+    expiring = {'price': 100.0, 'tp': 105.0, 'sl': 98.0}
+    closed_early = {'price': 100.0, 'tp': 101.0, 'sl': 98.0}
+    later = {'price': 100.0, 'tp': 105.0, 'sl': 98.0}
+    tracker.open_signal('BOOM1000', expiring, 0, 60)
+    tracker.open_signal('BOOM1000', closed_early, 0, 30)
+    tracker.open_signal('BOOM1000', later, 0, 600)
+
+    # closed_early gana antes de expirar; su entrada en el heap debe descartarse sin tocar stats
+    tracker.on_tick('BOOM1000', 101.5, 10)
+    tracker.on_tick('BOOM1000', 100.5, 60)
+
+    assert closed_early['status'] == 'won'
+    assert expiring['status'] == 'expired'
+    assert expiring['exit_price'] == 100.5
+    assert later['status'] == 'open'
+    assert [position_id for _, position_id in tracker.expiries['BOOM1000']] == [3]
+    stats = tracker.get_stats()['by_symbol']['BOOM1000']
+    assert (stats['open'], stats['won'], stats['expired']) == (1, 1, 1)
+
+
+def test_remove_finds_position_among_equal_levels():
+    tracker = SignalOutcomeTracker()
+    # Mismo TP para todas; sólo la del medio toca su SL y hay que quitarla del índice de TP
+    signals = [{'price': 100.0, 'tp': 105.0, 'sl': sl} for sl in (97.0, 99.0, 97.0)]
+    ids = [tracker.open_signal('BOOM1000', s, 0, 600) for s in signals]
+
+    tracker.on_tick('BOOM1000', 98.5, 1)
+
+    assert [s['status'] for s in signals] == ['open', 'lost', 'open']
+    assert tracker.tp_index['BOOM1000'] == ([105.0, 105.0], [ids[0], ids[2]])
+    assert tracker.sl_index['BOOM1000'] == ([97.0, 97.0], [ids[0], ids[2]])
+
+    tracker.on_tick('BOOM1000', 105.0, 2)
+    assert [s['status'] for s in signals] == ['won', 'lost', 'won']
+
+
+def test_stats_aggregate_outcomes_per_symbol():
+    tracker = SignalOutcomeTracker()
+    won = {'price': 100.0, 'tp': 104.0, 'sl': 98.0}
+    lost = {'price': 100.0, 'tp': 110.0, 'sl': 99.0}
+    tracker.open_signal('BOOM1000', won, 0, 600)
+    tracker.open_signal('CRASH1000', lost, 0, 600)
+    tracker.open_signal('CRASH1000', {'price': 100.0, 'tp': 110.0, 'sl': 90.0}, 0, 600)
+
+    tracker.on_tick('BOOM1000', 104.0, 1)
+    tracker.on_tick('CRASH1000', 99.0, 1)
+
+    stats = tracker.get_stats()
+    assert stats['total']['won'] == 1
+    assert stats['total']['lost'] == 1
+    assert stats['total']['open'] == 1
+    assert stats['total']['win_rate'] == 50
+    assert stats['total']['avg_pnl'] == 1.5
+    assert stats['by_symbol']['BOOM1000']['open'] == 0
+    assert stats['by_symbol']['CRASH1000']['open'] == 1
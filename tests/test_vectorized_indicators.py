@@ -0,0 +1,110 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from batch_analysis import BatchCandleAnalyzer  # noqa: E402
+from feature_export import FeatureExporter, INDICATOR_COLUMNS, load_features  # noqa: E402
+from main import BOOM1000CandleAnalyzer  # noqa: E402
+
+
+def random_candles(n, seed=0):
+    """Velas sintéticas con saltos ocasionales, suficientes para activar todas las ramas"""
+    rng = np.random.default_rng(seed)
+    closes = 10000 + np.cumsum(rng.normal(0, 1, n) + (rng.random(n) < 0.01) * 15)
+    opens = closes - rng.normal(0, 1, n)
+    return pd.DataFrame({
+        'timestamp': np.arange(n) * 60,
+        'open': opens,
+        'high': np.maximum(opens, closes) + rng.random(n),
+        'low': np.minimum(opens, closes) - rng.random(n),
+        'close': closes,
+        'volume': rng.integers(30, 90, n).astype(float),
+        'price_change': (closes - opens) / opens * 100
+    })
+
+
+def scalar_last_values(analyzer, candles, t):
+    """Lo que analyze_market vería en la vela t: la ventana de las últimas candles.maxlen velas"""
+    window = candles.iloc[max(0, t - analyzer.candles.maxlen + 1):t + 1]
+    indicators = analyzer.calculate_indicators(
+        window['close'].to_numpy(), window['high'].to_numpy(),
+        window['low'].to_numpy(), window['volume'].to_numpy()
+    )
+    return {name: indicators[name][-1] for name in INDICATOR_COLUMNS}
+
+
+def test_compute_chunk_matches_calculate_indicators():
+    analyzer = BOOM1000CandleAnalyzer(None, autostart=False)
+    candles = random_candles(1200)
+    rng = np.random.default_rng(1)
+    positions = np.concatenate([[49, 150, 199, 200], rng.integers(analyzer.min_candles - 1, len(candles), 20)])
+
+    for chunk_size in (77, 300, 1500):
+        exporter = FeatureExporter(analyzer, chunk_size=chunk_size)
+        history = None
+        parts = []
+        for chunk in exporter.iter_candles(candles):
+            parts.append(pd.DataFrame(exporter.compute_chunk(chunk, history)))
+            previous = chunk if history is None else pd.concat([history, chunk], ignore_index=True)
+            history = previous.iloc[-(exporter.window - 1):].reset_index(drop=True)
+        features = pd.concat(parts, ignore_index=True)
+
+        for t in positions:
+            expected = scalar_last_values(analyzer, candles, t)
+            for name in INDICATOR_COLUMNS:
+                np.testing.assert_allclose(features[name][t], expected[name], rtol=1e-9, atol=1e-9)
+
+
+def test_export_replaces_previous_parts(tmp_path):
+    exporter = FeatureExporter(BOOM1000CandleAnalyzer(None, autostart=False), chunk_size=100)
+    candles = random_candles(500)
+    exporter.export(candles, str(tmp_path))
+    exporter.chunk_size = 250
+    exporter.export(candles, str(tmp_path))
+    assert len(load_features(str(tmp_path))) == len(candles)
+
+
+def test_export_skips_empty_chunks(tmp_path):
+    exporter = FeatureExporter(BOOM1000CandleAnalyzer(None, autostart=False))
+    candles = random_candles(300)
+    chunks = [candles.iloc[:150], candles.iloc[150:150], candles.iloc[150:]]
+    assert exporter.export(chunks, str(tmp_path)) == len(candles)
+
+    features = load_features(str(tmp_path))
+    assert len(features) == len(candles)
+    np.testing.assert_array_equal(features['close'], candles['close'])
+
+
+def test_batched_indicators_match_calculate_indicators():
+    analyzers = []
+    for seed, n in enumerate([260, 260, 260, 120, 120]):
+        analyzer = BOOM1000CandleAnalyzer(None, autostart=False)
+        # Periodos no por defecto: deben llegar igual al camino escalar y al vectorizado
+        analyzer.roc_period = 7
+        analyzer.adx_period = 10
+        for candle in random_candles(n, seed).to_dict('records'):
+            analyzer.append_candle(candle)
+        analyzers.append(analyzer)
+    batch = BatchCandleAnalyzer(analyzers)
+
+    for length in (200, 120):
+        group = [a for a in analyzers if len(a.candles) == length]
+        windows = np.stack([a.candle_window() for a in group])
+        fields = {field: windows[:, i, :] for i, field in enumerate(group[0].candle_fields)}
+        batched = batch.reference.calculate_last_values(fields['close'], fields['high'], fields['low'],
+                                                        fields['volume'])
+
+        for row, analyzer in enumerate(group):
+            closes = np.array([c['close'] for c in analyzer.candles])
+            highs = np.array([c['high'] for c in analyzer.candles])
+            lows = np.array([c['low'] for c in analyzer.candles])
+            volumes = np.array([c['volume'] for c in analyzer.candles])
+            # El buffer circular debe reflejar exactamente la deque
+            np.testing.assert_array_equal(fields['close'][row], closes)
+            expected = analyzer.calculate_indicators(closes, highs, lows, volumes)
+            for name in INDICATOR_COLUMNS:
+                np.testing.assert_allclose(batched[name][row], expected[name][-1], rtol=1e-9, atol=1e-9)